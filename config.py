@@ -2,8 +2,11 @@
 
 BASE_URL = "https://www.petmart.vn/khay-ve-sinh-cho"
 CSS_SELECTOR = ".shop-container"
-REQUIRED_KEYS = [
-    "name",
-    "price",
-    "image_url",
-]
\ No newline at end of file
+# frozenset so completeness checks use a C-level subset test
+REQUIRED_KEYS = frozenset(
+    {
+        "name",
+        "price",
+        "image_url",
+    }
+)
\ No newline at end of file
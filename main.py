@@ -1,70 +1,152 @@
 import asyncio
+import json
+import logging
+import os
+import time
 
 from crawl4ai import AsyncWebCrawler
 from dotenv import load_dotenv
 
 from config import BASE_URL, CSS_SELECTOR, REQUIRED_KEYS
 from utils.data_utils import (
-    save_products_to_csv,
+    NameDedup,
+    format_product_rows,
+    product_csv_header,
 )
 from utils.scraper_utils import (
-    fetch_and_process_page,
+    fetch_batch,
     get_browser_config,
     get_llm_strategy,
 )
 
 load_dotenv()
 
+# Pages fetched together and extracted with a single LLM call
+LLM_BATCH_SIZE = 3
+# Output file for the crawled products
+OUTPUT_CSV = "complete_products.csv"
+# Resume state: last completed page plus persisted dedup filter
+CHECKPOINT_FILE = ".crawl_ckpt.json"
+DEDUP_STATE_FILE = "seen_names.bloom"
+
+
+def load_checkpoint() -> dict:
+    """
+    Reads the resume checkpoint left by a previous run, if any.
+
+    Returns:
+        dict: The checkpoint contents, or an empty dict when no usable
+            checkpoint exists.
+    """
+    try:
+        with open(CHECKPOINT_FILE, encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def save_checkpoint(page_number: int):
+    """
+    Records the last fully processed page, atomically via os.replace().
+    """
+    tmp_path = f"{CHECKPOINT_FILE}.tmp"
+    with open(tmp_path, mode="w", encoding="utf-8") as file:
+        json.dump({"page": page_number, "ts": time.time()}, file)
+    os.replace(tmp_path, CHECKPOINT_FILE)
+
 
 async def crawl_products():
     """
     Main function to crawl product data from the website.
+
+    Pages are fetched concurrently in batches of LLM_BATCH_SIZE (with a
+    per-domain rate limiter keeping requests polite) and each batch is
+    extracted with a single LLM call. Rows are streamed to the CSV as
+    each batch completes, so memory stays flat and progress survives a
+    crash.
     """
     # Initialize configurations
     browser_config = get_browser_config()
     llm_strategy = get_llm_strategy()
     session_id = "product_crawl_session"
 
-    # Initialize state variables
-    page_number = 1
-    all_products = []
-    seen_names = set()
+    # Initialize state variables, resuming from a previous run if possible
+    total_products = 0
+    checkpoint = load_checkpoint()
+    start_page = checkpoint.get("page", 0) + 1
+    resuming = start_page > 1
+    dedup = None
+    if resuming:
+        dedup = NameDedup.load(DEDUP_STATE_FILE)
+        print(f"Resuming crawl from page {start_page}.")
+    if dedup is None:
+        dedup = NameDedup()
+
+    # Open the CSV up front and stream rows as batches complete; the large
+    # buffer batches syscalls while flush() bounds data loss to one batch
+    output_file = open(
+        OUTPUT_CSV,
+        mode="a" if resuming else "w",
+        newline="",
+        encoding="utf-8",
+        buffering=1 << 20,
+    )
+    if not resuming:
+        output_file.write(product_csv_header())
 
     # Start the web crawler context
     # https://docs.crawl4ai.com/api/async-webcrawler/#asyncwebcrawler
     async with AsyncWebCrawler(config=browser_config) as crawler:
+        batch_start = start_page
         while True:
-            # Fetch and process data from the current page
-            products, no_results_found = await fetch_and_process_page(
+            # Fetch one batch of pages and extract it in a single LLM call
+            page_numbers = list(range(batch_start, batch_start + LLM_BATCH_SIZE))
+            products, no_results_found, last_completed_page = await fetch_batch(
                 crawler,
-                page_number,
+                page_numbers,
                 BASE_URL,
                 CSS_SELECTOR,
                 llm_strategy,
                 session_id,
                 REQUIRED_KEYS,
-                seen_names,
+                dedup,
             )
 
+            if products:
+                # Stream this batch's rows straight to disk
+                output_file.writelines(format_product_rows(products))
+                output_file.flush()
+                total_products += len(products)
+
+            if last_completed_page is not None:
+                # Only pages that actually completed may be checkpointed;
+                # anything after a failed fetch/extraction is retried on
+                # the next run instead of being skipped forever
+                dedup.save(DEDUP_STATE_FILE)
+                save_checkpoint(last_completed_page)
+
             if no_results_found:
                 print("No more products found. Ending crawl.")
                 break  # Stop crawling when "No Results Found" message appears
 
+            if last_completed_page is None:
+                print(f"No pages completed in batch starting at {batch_start}.")
+                break  # Persistent failure; resume will retry these pages
+
             if not products:
-                print(f"No products extracted from page {page_number}.")
+                print(
+                    f"No products extracted from pages "
+                    f"{page_numbers[0]}-{last_completed_page}."
+                )
                 break  # Stop if no products are extracted
 
-            # Add the products from this page to the total list
-            all_products.extend(products)
-            page_number += 1  # Move to the next page
-
-            # Pause between requests to be polite and avoid rate limits
-            await asyncio.sleep(2)  # Adjust sleep time as needed
+            # Resume right after the last completed page so a partially
+            # failed batch re-attempts its remaining pages
+            batch_start = last_completed_page + 1
 
-    # Save the collected products to a CSV file
-    if all_products:
-        save_products_to_csv(all_products, "complete_products.csv")
-        print(f"Saved {len(all_products)} products to 'complete_products.csv'.")
+    output_file.close()
+    if total_products:
+        print(f"Saved {total_products} products to '{OUTPUT_CSV}'.")
     else:
         print("No products were found during the crawl.")
 
@@ -80,4 +162,6 @@ async def main():
 
 
 if __name__ == "__main__":
+    # INFO by default; switch to DEBUG for per-product extraction output
+    logging.basicConfig(level=logging.INFO)
     asyncio.run(main())
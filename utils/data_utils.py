@@ -1,14 +1,189 @@
-import csv
+import hashlib
+import json
+import os
+import pickle
+import re
+import struct
+
+from datasketch import MinHash, MinHashLSH
+from pybloom_live import BloomFilter
 
 from models.venue import Product
 
+# Computed once at import; model_fields reflection is not free on hot paths
+_PRODUCT_FIELDS = tuple(Product.model_fields.keys())
+
+
+def _name_key(product_name: str) -> str:
+    # Collapse trivial whitespace/case variants so "Royal Canin " and
+    # "royal canin" dedup to the same key
+    return product_name.strip().lower()
+
+
+def _stable_hash(key: str) -> int:
+    # Process-independent 64-bit hash (built-in hash() is salted per run)
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+
+
+# MinHash signature size; 64 permutations keeps per-name cost small while
+# still resolving the 0.85 similarity threshold reliably
+_MINHASH_PERMS = 64
+_NEAR_DUP_THRESHOLD = 0.85
+
+# Word characters only (unicode-aware, so Vietnamese names tokenize fine);
+# punctuation must not make tokens distinct or "4kg" vs "(4kg)" would
+# never land in the same LSH bucket
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def _name_minhash(key: str) -> MinHash:
+    # Token-level MinHash: names that share most words hash as similar,
+    # so "... 4kg" and "... (4kg)" land in the same LSH bucket
+    minhash = MinHash(num_perm=_MINHASH_PERMS)
+    for token in _TOKEN_RE.findall(key):
+        minhash.update(token.encode())
+    return minhash
+
+
+class NameDedup:
+    """
+    Memory-efficient duplicate detector for product names.
+
+    A Bloom filter answers the common "never seen" case in O(k) with a
+    fixed memory footprint, and a small set of confirmed hashes rules out
+    the filter's false positives. Names that pass the exact check are then
+    probed against a MinHash LSH index, so near-duplicates like
+    "Royal Canin Medium Adult 4kg" vs "Royal Canin Medium Adult (4kg)"
+    are caught without any O(N^2) pairwise comparison.
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 1e-4):
+        self._bloom = BloomFilter(capacity=capacity, error_rate=error_rate)
+        self._confirmed = set()
+        self._lsh = MinHashLSH(
+            threshold=_NEAR_DUP_THRESHOLD, num_perm=_MINHASH_PERMS
+        )
+
+    def check_and_add(self, product_name: str) -> bool:
+        """
+        Returns True if the name (or a near-duplicate of it) was already
+        seen, otherwise records it.
+        """
+        key = _name_key(product_name)
+        if key in self._bloom and _stable_hash(key) in self._confirmed:
+            return True
+
+        # Not an exact repeat; check for a near-duplicate neighbour
+        minhash = _name_minhash(key)
+        if self._lsh.query(minhash):
+            return True
+
+        self._bloom.add(key)
+        self._confirmed.add(_stable_hash(key))
+        self._lsh.insert(key, minhash)
+        return False
 
-def is_duplicate_product(product_name: str, seen_names: set) -> bool:
-    return product_name in seen_names
+    def save(self, path: str):
+        """
+        Persists the dedup state so it survives a restart.
 
+        The Bloom filter bits go to `path` and the confirmed hashes to
+        `path`.confirmed, each written via a temp file + os.replace() so a
+        crash mid-write cannot corrupt them.
+        """
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, mode="wb") as file:
+            self._bloom.tofile(file)
+        os.replace(tmp_path, path)
 
-def is_complete_product(product: dict, required_keys: list) -> bool:
-    return all(key in product and product[key] for key in required_keys)
+        confirmed_path = f"{path}.confirmed"
+        tmp_path = f"{confirmed_path}.tmp"
+        with open(tmp_path, mode="w", encoding="utf-8") as file:
+            json.dump(sorted(self._confirmed), file)
+        os.replace(tmp_path, confirmed_path)
+
+        # The LSH index has no flat serialization, so it is pickled
+        lsh_path = f"{path}.lsh"
+        tmp_path = f"{lsh_path}.tmp"
+        with open(tmp_path, mode="wb") as file:
+            pickle.dump(self._lsh, file)
+        os.replace(tmp_path, lsh_path)
+
+    @classmethod
+    def load(cls, path: str):
+        """
+        Restores dedup state written by save().
+
+        Returns:
+            Optional[NameDedup]: The restored instance, or None if either
+                state file is missing or unreadable.
+        """
+        try:
+            with open(path, mode="rb") as file:
+                bloom = BloomFilter.fromfile(file)
+            with open(f"{path}.confirmed", encoding="utf-8") as file:
+                confirmed = set(json.load(file))
+        # fromfile() raises struct.error on a truncated/corrupt state file
+        except (OSError, ValueError, struct.error):
+            return None
+
+        # A missing/corrupt LSH file (e.g. state from an older run) only
+        # costs near-duplicate coverage, so fall back to an empty index
+        # rather than discarding the exact-dedup state
+        try:
+            with open(f"{path}.lsh", mode="rb") as file:
+                lsh = pickle.load(file)
+        except (OSError, pickle.UnpicklingError):
+            lsh = MinHashLSH(
+                threshold=_NEAR_DUP_THRESHOLD, num_perm=_MINHASH_PERMS
+            )
+
+        dedup = cls.__new__(cls)
+        dedup._bloom = bloom
+        dedup._confirmed = confirmed
+        dedup._lsh = lsh
+        return dedup
+
+
+def is_duplicate_product(product_name: str, dedup: NameDedup) -> bool:
+    return dedup.check_and_add(product_name)
+
+
+def is_complete_product(product: dict, required_keys: frozenset) -> bool:
+    # Subset test runs as a single C-level loop over the required keys
+    return required_keys <= product.keys() and all(
+        product[key] for key in required_keys
+    )
+
+
+def _quote_csv_value(value) -> str:
+    # Quote only when the value actually needs it (comma, quote, newline);
+    # the common case then costs one containment scan and no copy
+    text = "" if value is None else str(value)
+    if any(ch in text for ch in (",", '"', "\n", "\r")):
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+
+def product_csv_header() -> str:
+    """
+    Returns the CSV header line for Product rows.
+    """
+    return ",".join(_PRODUCT_FIELDS) + "\n"
+
+
+def format_product_rows(products: list):
+    """
+    Yields one CSV line per product.
+
+    The Product schema is fixed, so rows are formatted directly instead
+    of going through csv.DictWriter's per-row dialect machinery.
+    """
+    for product in products:
+        yield (
+            ",".join(_quote_csv_value(product.get(key, "")) for key in _PRODUCT_FIELDS)
+            + "\n"
+        )
 
 
 def save_products_to_csv(products: list, filename: str):
@@ -16,11 +191,9 @@ def save_products_to_csv(products: list, filename: str):
         print("No products to save.")
         return
 
-    # Use field names from the Product model
-    fieldnames = Product.model_fields.keys()
-
-    with open(filename, mode="w", newline="", encoding="utf-8") as file:
-        writer = csv.DictWriter(file, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(products)
+    with open(
+        filename, mode="w", newline="", encoding="utf-8", buffering=1 << 20
+    ) as file:
+        file.write(product_csv_header())
+        file.writelines(format_product_rows(products))
     print(f"Saved {len(products)} products to '{filename}'.")
\ No newline at end of file
@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+import time
+from typing import Optional
+
+# Directory where cached extractions live, one JSON file per cache key
+CACHE_DIR = os.path.join("data", "llm_cache")
+
+
+def compute_cache_key(provider: str, instruction: str, cleaned_html: str) -> str:
+    """
+    Computes a content-addressable cache key for one page extraction.
+
+    The key covers the LLM provider/model, the extraction instruction, and
+    the page HTML, so changing any of them invalidates old entries. The
+    HTML is length-prefixed before hashing to rule out concatenation
+    collisions between different inputs.
+
+    Args:
+        provider (str): The LLM provider/model identifier.
+        instruction (str): The extraction instruction sent to the LLM.
+        cleaned_html (str): The cleaned HTML of the page.
+
+    Returns:
+        str: A hex SHA-256 digest identifying this extraction.
+    """
+    instruction_hash = hashlib.sha256(instruction.encode()).hexdigest()
+    payload = len(cleaned_html).to_bytes(8, "little") + cleaned_html.encode()
+    page_hash = hashlib.sha256(payload).hexdigest()
+    return hashlib.sha256(
+        f"{provider}:{instruction_hash}:{page_hash}".encode()
+    ).hexdigest()
+
+
+def get(cache_key: str) -> Optional[str]:
+    """
+    Looks up a cached extraction result.
+
+    Args:
+        cache_key (str): Key produced by compute_cache_key().
+
+    Returns:
+        Optional[str]: The cached extracted JSON string, or None on a miss
+            or if the cache file is unreadable.
+    """
+    path = os.path.join(CACHE_DIR, f"{cache_key}.json")
+    try:
+        with open(path, encoding="utf-8") as file:
+            entry = json.load(file)
+    except (OSError, json.JSONDecodeError):
+        return None
+    return entry.get("extracted")
+
+
+def set(cache_key: str, extracted_content: str, provider: str, instruction: str):
+    """
+    Stores an extraction result under the given key.
+
+    Empty extractions are not stored: an empty list is more often a
+    transient LLM failure than a truly empty page, and caching one would
+    pin that failure so the page is never re-queried.
+
+    The entry is written to a temporary file and moved into place with
+    os.replace() so a crash mid-write never leaves a corrupt cache file.
+
+    Args:
+        cache_key (str): Key produced by compute_cache_key().
+        extracted_content (str): The JSON string returned by the LLM.
+        provider (str): The LLM provider/model identifier (for inspection).
+        instruction (str): The extraction instruction (hashed for inspection).
+    """
+    if not extracted_content or extracted_content.strip() in ("[]", "null"):
+        return
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    entry = {
+        "provider": provider,
+        "instruction_hash": hashlib.sha256(instruction.encode()).hexdigest(),
+        "timestamp": time.time(),
+        "extracted": extracted_content,
+    }
+    path = os.path.join(CACHE_DIR, f"{cache_key}.json")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, mode="w", encoding="utf-8") as file:
+        json.dump(entry, file)
+    os.replace(tmp_path, path)
@@ -1,6 +1,19 @@
-import json
+import asyncio
+import atexit
+import functools
+import io
+import logging
+import operator
 import os
-from typing import List, Set, Tuple
+import random
+import time
+from typing import List, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+import ijson
+import litellm
+import orjson
 
 from crawl4ai import (
     AsyncWebCrawler,
@@ -10,8 +23,106 @@ from crawl4ai import (
     LLMExtractionStrategy,
 )
 
+from pydantic import ValidationError
+
 from models.venue import Product
-from utils.data_utils import is_complete_product, is_duplicate_product
+from utils import llm_cache
+from utils.data_utils import NameDedup, is_duplicate_product
+
+logger = logging.getLogger(__name__)
+
+# Extraction instruction sent with every LLM call. A single module-level
+# constant keeps it byte-for-byte identical across pages, which also makes
+# it a stable component of the extraction cache key.
+SYSTEM_PROMPT = """
+You are extracting product information from PetMart.vn, a Vietnamese pet supply website.
+
+Extract the following information for each pet product in JSON format:
+- name: Full product name
+- category: Product category (like "Dog Food", "Dog Accessories", etc.)
+- price: Product price including currency (VND)
+- brand: Brand name if available (can be null)
+- image_url: Full URL of the main product image
+
+For image URLs, if you see a relative path starting with "/", prepend "https://www.petmart.vn".
+
+Example response format:
+{
+    "name": "Royal Canin Medium Adult",
+    "category": "Dog Food",
+    "price": "350.000 VND",
+    "brand": "Royal Canin",
+    "image_url": "https://www.petmart.vn/path/to/image.jpg"
+}
+
+Make sure to extract complete information when possible and set null values when information is not found.
+
+The input may contain several result pages concatenated together, each introduced by a marker line "### PAGE <number>". Extract products from every page in the input, and include a "source_page" field on each product set to the page number it appeared under (use 1 if no markers are present).
+"""
+
+# Computed once at import; model_json_schema() walks the whole model graph
+_PRODUCT_SCHEMA = Product.model_json_schema()
+
+# LiteLLM (which the extraction strategy calls through) opens a fresh TLS
+# connection per completion unless handed a session. Sharing keep-alive
+# HTTP/2 clients pays the handshake once per crawl instead of per page.
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=20, keepalive_expiry=30)
+litellm.client_session = httpx.Client(
+    http2=True, timeout=60.0, limits=_HTTP_LIMITS
+)
+litellm.aclient_session = httpx.AsyncClient(
+    http2=True, timeout=60.0, limits=_HTTP_LIMITS
+)
+
+
+def _close_http_sessions():
+    litellm.client_session.close()
+    try:
+        asyncio.run(litellm.aclient_session.aclose())
+    except RuntimeError:
+        # No usable event loop during interpreter shutdown; the OS
+        # reclaims the sockets at exit anyway
+        pass
+
+
+atexit.register(_close_http_sessions)
+
+
+class DomainLimiter:
+    """
+    Per-domain rate limiter with randomized spacing between requests.
+
+    acquire() reserves the next allowed slot for the domain and sleeps
+    only until that slot arrives, so politeness delays overlap with other
+    in-flight work instead of stalling the whole crawl the way a fixed
+    sleep between pages did. The jitter makes the request pattern less
+    mechanical than a constant interval.
+    """
+
+    def __init__(self, min_delay: float = 1.0, max_delay: float = 2.5):
+        self._min_delay = min_delay
+        self._max_delay = max_delay
+        self._next_allowed = {}  # domain -> monotonic time of next allowed request
+
+    async def acquire(self, domain: str):
+        """
+        Waits until the domain's next request slot, then reserves a new one.
+        """
+        now = time.monotonic()
+        start = max(now, self._next_allowed.get(domain, now))
+        self._next_allowed[domain] = start + random.uniform(
+            self._min_delay, self._max_delay
+        )
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+# One limiter shared by every fetch in the process
+_domain_limiter = DomainLimiter()
+
+# Scanned as bytes so the search runs as a single C memmem pass over the
+# page buffer instead of a str-in-str on multi-MB HTML
+_NO_RESULTS_SENTINEL = b"No Results Found"
 
 
 def get_browser_config() -> BrowserConfig:
@@ -24,15 +135,26 @@ def get_browser_config() -> BrowserConfig:
     # https://docs.crawl4ai.com/core/browser-crawler-config/
     return BrowserConfig(
         browser_type="chromium",  # Type of browser to simulate
-        headless=False,  # Whether to run in headless mode (no GUI)
-        verbose=True,  # Enable verbose logging
+        headless=True,  # No GUI: skips window rendering/compositor work
+        verbose=False,  # Keep per-page chatter out of the logs
+        extra_args=[
+            # The LLM only sees markdown, so image bytes are pure waste
+            "--blink-settings=imagesEnabled=false",
+            "--disable-gpu",
+            "--disable-dev-shm-usage",
+            "--no-sandbox",
+        ],
     )
 
 
+@functools.lru_cache(maxsize=1)
 def get_llm_strategy() -> LLMExtractionStrategy:
     """
     Returns the configuration for the language model extraction strategy.
 
+    The strategy only depends on static configuration, so it is built once
+    and memoized for the life of the process.
+
     Returns:
         LLMExtractionStrategy: The settings for how to extract data using LLM.
     """
@@ -40,159 +162,528 @@ def get_llm_strategy() -> LLMExtractionStrategy:
     return LLMExtractionStrategy(
         provider="groq/deepseek-r1-distill-llama-70b",  # Name of the LLM provider
         api_token=os.getenv("GROQ_API_KEY"),  # API token for authentication
-        schema=Product.model_json_schema(),  # JSON schema of the data model
+        schema=_PRODUCT_SCHEMA,  # JSON schema of the data model
         extraction_type="schema",  # Type of extraction to perform
-        instruction=(
-            """
-            You are extracting product information from PetMart.vn, a Vietnamese pet supply website.
-            
-            Extract the following information for each pet product in JSON format:
-            - name: Full product name
-            - category: Product category (like "Dog Food", "Dog Accessories", etc.)
-            - price: Product price including currency (VND)
-            - brand: Brand name if available (can be null)
-            - image_url: Full URL of the main product image
-            
-            For image URLs, if you see a relative path starting with "/", prepend "https://www.petmart.vn".
-            
-            Example response format:
-            {
-                "name": "Royal Canin Medium Adult",
-                "category": "Dog Food",
-                "price": "350.000 VND",
-                "brand": "Royal Canin",
-                "image_url": "https://www.petmart.vn/path/to/image.jpg"
-            }
-            
-            Make sure to extract complete information when possible and set null values when information is not found.
-            """
-        ),  # Instructions for the LLM
+        instruction=SYSTEM_PROMPT,  # Instructions for the LLM
         input_format="markdown",  # Format of the input content
+        # Without this the strategy re-splits input at ~2048 tokens, which
+        # would turn one batched document back into several LLM calls and
+        # could cut it mid "### PAGE" section; MAX_BATCH_CHARS already
+        # bounds what a single call may carry
+        apply_chunking=False,
         verbose=True,  # Enable verbose logging
     )
 
 
-async def check_no_results(
-    crawler: AsyncWebCrawler,
-    url: str,
-    session_id: str,
-) -> bool:
+# How many times to re-ask the LLM when its output fails validation
+MAX_EXTRACTION_ATTEMPTS = 3
+
+# Upper bound on the merged markdown sent in one LLM call; batches that
+# would exceed it are split so a large page never blows the token budget
+MAX_BATCH_CHARS = 24_000
+
+
+@functools.lru_cache(maxsize=None)
+def _get_run_config(css_selector: str, session_id: str) -> CrawlerRunConfig:
+    """
+    Builds the page-fetch run config once per (selector, session) pair.
+
+    Only a handful of session ids exist (one per batch slot), so memoizing
+    on both keys keeps config construction out of the page loop without
+    needing to mutate or copy configs per call. Reusing the session id
+    keeps the same browser context alive across pages, avoiding a
+    Chromium respawn per navigation.
     """
-    Checks if the "No Results Found" message is present on the page.
+    return CrawlerRunConfig(
+        cache_mode=CacheMode.BYPASS,  # Do not use cached data
+        css_selector=css_selector,  # Target specific content on the page
+        session_id=session_id,  # Unique session ID for the crawl
+        page_timeout=30000,  # Give up on a hung navigation after 30s
+        exclude_external_images=True,  # Skip third-party image handling
+        wait_for_images=False,  # Let the load event fire before images
+    )
+
+
+def _strategy_with_feedback(
+    llm_strategy: LLMExtractionStrategy, error_text: str
+) -> LLMExtractionStrategy:
+    """
+    Clones the extraction strategy with the validation error appended.
+
+    Re-sending the concrete error gives the model a chance to fix its own
+    output on the retry instead of repeating the same mistake.
 
     Args:
-        crawler (AsyncWebCrawler): The web crawler instance.
-        url (str): The URL to check.
-        session_id (str): The session identifier.
+        llm_strategy (LLMExtractionStrategy): The original strategy.
+        error_text (str): The validation error from the failed attempt.
 
     Returns:
-        bool: True if "No Results Found" message is found, False otherwise.
+        LLMExtractionStrategy: A new strategy with the feedback included.
     """
-    # Fetch the page without any CSS selector or extraction strategy
-    result = await crawler.arun(
-        url=url,
-        config=CrawlerRunConfig(
-            cache_mode=CacheMode.BYPASS,
-            session_id=session_id,
+    return LLMExtractionStrategy(
+        provider=llm_strategy.provider,
+        api_token=llm_strategy.api_token,
+        schema=llm_strategy.schema,
+        # The strategy stores the extraction_type argument as extract_type
+        extraction_type=llm_strategy.extract_type,
+        instruction=(
+            f"{llm_strategy.instruction}\n\n"
+            f"Your previous output had this error: {error_text}\n"
+            "Fix the problem and produce the output again."
         ),
+        input_format=llm_strategy.input_format,
+        apply_chunking=llm_strategy.apply_chunking,
+        verbose=llm_strategy.verbose,
     )
-    
 
-    if result.success:
-        if "No Results Found" in result.cleaned_html:
+
+def _validate_extraction(extracted_content: str) -> None:
+    """
+    Checks that an extraction parses and matches the Product schema.
+
+    Args:
+        extracted_content (str): The JSON string produced by the LLM.
+
+    Raises:
+        ValueError: With a message suitable as retry feedback, when the
+            content is not valid JSON, is not a list of objects, or no
+            item in it validates against the Product model.
+    """
+    try:
+        items = orjson.loads(extracted_content)
+    except orjson.JSONDecodeError as error:
+        raise ValueError(f"output was not valid JSON: {error}")
+
+    if not isinstance(items, list):
+        raise ValueError("output must be a JSON list of product objects")
+
+    first_error = None
+    valid_count = 0
+    for item in items:
+        if not isinstance(item, dict):
+            raise ValueError("every list entry must be a JSON object")
+        data = {key: value for key, value in item.items() if key != "error"}
+        try:
+            Product.model_validate(data)
+            valid_count += 1
+        except ValidationError as error:
+            if first_error is None:
+                first_error = str(error)
+
+    # Tolerate a few bad items (the completeness filter drops them later),
+    # but a page where nothing validates is a failed extraction
+    if items and valid_count == 0:
+        raise ValueError(first_error)
+
+
+def is_valid_cached_extraction(extracted_content: str) -> bool:
+    """
+    Validates a cached extraction before trusting it.
+
+    Mirrors the write-side tolerance of _validate_extraction: a non-empty
+    list where at least one item matches the Product schema is accepted,
+    since the completeness filter drops bad siblings downstream. Requiring
+    every item to validate would reject entries the write side happily
+    stored and silently re-pay the LLM for them on every re-crawl.
+
+    Args:
+        extracted_content (str): The cached JSON string.
+
+    Returns:
+        bool: True if the content parses to a non-empty list of objects of
+            which at least one matches the Product schema, False otherwise.
+    """
+    try:
+        items = orjson.loads(extracted_content)
+    except orjson.JSONDecodeError:
+        return False
+
+    # An empty list is treated as a miss so the page gets re-queried;
+    # entries written before empties were rejected may still hold one
+    if not isinstance(items, list) or not items:
+        return False
+
+    for item in items:
+        if not isinstance(item, dict):
+            return False
+
+    for item in items:
+        # The crawler adds an 'error' flag that is not part of the schema
+        data = {key: value for key, value in item.items() if key != "error"}
+        try:
+            Product.model_validate(data)
             return True
-    else:
-        print(
-            f"Error fetching page for 'No Results Found' check: {result.error_message}"
-        )
+        except ValidationError:
+            continue
 
     return False
 
 
-async def fetch_and_process_page(
+async def _fetch_page(
     crawler: AsyncWebCrawler,
     page_number: int,
     base_url: str,
     css_selector: str,
-    llm_strategy: LLMExtractionStrategy,
     session_id: str,
-    required_keys: List[str],
-    seen_names: Set[str],
-) -> Tuple[List[dict], bool]:
+) -> Tuple[int, Optional[str], str, bool]:
     """
-    Fetches and processes a single page of product data.
+    Fetches one page and returns its markdown and cleaned HTML.
 
     Args:
         crawler (AsyncWebCrawler): The web crawler instance.
         page_number (int): The page number to fetch.
         base_url (str): The base URL of the website.
         css_selector (str): The CSS selector to target the content.
-        llm_strategy (LLMExtractionStrategy): The LLM extraction strategy.
         session_id (str): The session identifier.
-        required_keys (List[str]): List of required keys in the product data.
-        seen_names (Set[str]): Set of product names that have already been seen.
 
     Returns:
-        Tuple[List[dict], bool]:
-            - List[dict]: A list of processed products from the page.
-            - bool: A flag indicating if the "No Results Found" message was encountered.
+        Tuple[int, Optional[str], str, bool]:
+            - int: The page number (so gathered results stay attributable).
+            - Optional[str]: The page markdown, or None on a fetch error.
+            - str: The cleaned HTML (used as the LLM cache key).
+            - bool: True if the "No Results Found" sentinel was present.
     """
     url = f"{base_url}?page={page_number}"
     print(f"Loading page {page_number}...")
 
-    # Check if "No Results Found" message is present
-    no_results = await check_no_results(crawler, url, session_id)
-    if no_results:
-        return [], True  # No more results, signal to stop crawling
-
-    # Fetch page content with the extraction strategy
+    await _domain_limiter.acquire(urlparse(url).netloc)
     result = await crawler.arun(
         url=url,
-        config=CrawlerRunConfig(
-            cache_mode=CacheMode.BYPASS,  # Do not use cached data
-            extraction_strategy=llm_strategy,  # Strategy for data extraction
-            css_selector=css_selector,  # Target specific content on the page
-            session_id=session_id,  # Unique session ID for the crawl
-        ),
+        config=_get_run_config(css_selector, session_id),
     )
 
-    if not (result.success and result.extracted_content):
+    if not result.success:
         print(f"Error fetching page {page_number}: {result.error_message}")
-        return [], False
+        return page_number, None, "", False
 
-    # Parse extracted content
-    extracted_data = json.loads(result.extracted_content)
-    if not extracted_data:
-        print(f"No products found on page {page_number}.")
-        return [], False
+    page_html = result.cleaned_html or ""
+    html_bytes = page_html.encode() if isinstance(page_html, str) else page_html
+    if html_bytes.find(_NO_RESULTS_SENTINEL) != -1:
+        return page_number, None, page_html, True
+
+    return page_number, str(result.markdown or ""), page_html, False
+
+
+async def _extract_with_retries(
+    llm_strategy: LLMExtractionStrategy,
+    url: str,
+    content: str,
+    label: str,
+) -> Optional[str]:
+    """
+    Runs the LLM extraction with validation-feedback retries.
+
+    The strategy's run() is blocking, so it is pushed to a worker thread
+    off the event loop. Each result is validated against the Product
+    schema; on failure the concrete error is appended to a cloned
+    strategy's instruction and the call is retried with a growing backoff.
+
+    Args:
+        llm_strategy (LLMExtractionStrategy): The base extraction strategy.
+        url (str): The URL the content came from (passed through to run()).
+        content (str): The markdown to extract from.
+        label (str): Human-readable label for log messages.
+
+    Returns:
+        Optional[str]: The validated extraction JSON, or None if every
+            attempt failed.
+    """
+    strategy = llm_strategy
+    for attempt in range(MAX_EXTRACTION_ATTEMPTS):
+        blocks = await asyncio.to_thread(strategy.run, url, [content])
+        candidate = orjson.dumps(blocks).decode()
+        try:
+            _validate_extraction(candidate)
+        except ValueError as error:
+            if attempt == MAX_EXTRACTION_ATTEMPTS - 1:
+                print(
+                    f"Extraction failed for {label} after "
+                    f"{MAX_EXTRACTION_ATTEMPTS} attempts: {error}"
+                )
+                return None
+            print(
+                f"Extraction attempt {attempt + 1} for {label} "
+                f"failed ({error}); retrying with feedback."
+            )
+            strategy = _strategy_with_feedback(llm_strategy, str(error))
+            await asyncio.sleep(1.0 * (attempt + 1))
+            continue
+        return candidate
+    return None
+
+
+def _process_product_stream(
+    extracted_content: str,
+    required_keys: frozenset,
+    dedup: NameDedup,
+) -> Tuple[List[dict], int]:
+    """
+    Filters a stream of extracted products down to complete, unseen ones.
 
-    # After parsing extracted content
-    print("Extracted data:", extracted_data)
+    Products are streamed out of the extraction JSON with ijson instead of
+    materializing the whole list up front, so peak memory stays at one
+    product while each item feeds the filters as soon as it parses.
+
+    Args:
+        extracted_content (str): The extraction JSON produced by the LLM.
+        required_keys (frozenset): Keys that must be present and non-empty.
+        dedup (NameDedup): Duplicate detector for product names already seen.
+
+    Returns:
+        Tuple[List[dict], int]:
+            - List[dict]: The complete, deduplicated products.
+            - int: How many products the LLM extracted in total.
+    """
+    product_stream = ijson.items(io.BytesIO(extracted_content.encode()), "item")
+
+    # Compile the required-key lookup once; itemgetter fetches all keys
+    # in a single C call instead of a Python loop per product
+    completeness_getter = operator.itemgetter(*required_keys)
+    single_required_key = len(required_keys) == 1
 
-    # Process products
     complete_products = []
-    for product in extracted_data:
-        # Debugging: Print each product to understand its structure
-        print("Processing product:", product)
+    extracted_count = 0
+    for product in product_stream:
+        extracted_count += 1
+        # Per-product output is debug-only: stdout writes are synchronous
+        # under asyncio and str(product) on every item stalls the loop.
+        # The isEnabledFor guard skips even building the message at INFO.
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Processing product: %s", product)
 
         # Ignore the 'error' key if it's False
         if product.get("error") is False:
             product.pop("error", None)  # Remove the 'error' key if it's False
 
-        if not is_complete_product(product, required_keys):
+        # The batch marker field is for the LLM's bookkeeping, not the CSV
+        product.pop("source_page", None)
+
+        # Completeness is the cheapest filter, so run it before dedup
+        try:
+            values = completeness_getter(product)
+        except (KeyError, TypeError):
             continue  # Skip incomplete products
+        if single_required_key:
+            values = (values,)  # itemgetter returns a bare value for one key
+        if not all(values):
+            continue  # Skip products with empty required values
 
-        if is_duplicate_product(product["name"], seen_names):
-            print(f"Duplicate product '{product['name']}' found. Skipping.")
+        # check_and_add records the name when it has not been seen before.
+        # str() guards against the LLM emitting a non-string name, which
+        # would pass the truthiness check above but break .strip()
+        normalized_name = str(product.get("name", "")).strip().lower()
+        if is_duplicate_product(normalized_name, dedup):
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Duplicate product '%s' found. Skipping.", product["name"]
+                )
             continue  # Skip duplicate products
 
         # Add product to the list
-        seen_names.add(product["name"])
         complete_products.append(product)
 
+    return complete_products, extracted_count
+
+
+async def fetch_and_process_page(
+    crawler: AsyncWebCrawler,
+    page_number: int,
+    base_url: str,
+    css_selector: str,
+    llm_strategy: LLMExtractionStrategy,
+    session_id: str,
+    required_keys: frozenset,
+    dedup: NameDedup,
+) -> Tuple[List[dict], bool]:
+    """
+    Fetches and processes a single page of product data.
+
+    Args:
+        crawler (AsyncWebCrawler): The web crawler instance.
+        page_number (int): The page number to fetch.
+        base_url (str): The base URL of the website.
+        css_selector (str): The CSS selector to target the content.
+        llm_strategy (LLMExtractionStrategy): The LLM extraction strategy.
+        session_id (str): The session identifier.
+        required_keys (frozenset): Keys that must be present and non-empty.
+        dedup (NameDedup): Duplicate detector for product names already seen.
+
+    Returns:
+        Tuple[List[dict], bool]:
+            - List[dict]: A list of processed products from the page.
+            - bool: A flag indicating if the "No Results Found" message was encountered.
+    """
+    page_number, markdown, page_html, no_results = await _fetch_page(
+        crawler, page_number, base_url, css_selector, session_id
+    )
+    if no_results:
+        return [], True  # No more results, signal to stop crawling
+    if markdown is None:
+        return [], False  # Fetch error already reported
+
+    # Look up a previous extraction of this exact page content
+    cache_key = llm_cache.compute_cache_key(
+        llm_strategy.provider, llm_strategy.instruction, page_html
+    )
+    extracted_content = llm_cache.get(cache_key)
+    if extracted_content is not None and is_valid_cached_extraction(
+        extracted_content
+    ):
+        print(f"Cache hit for page {page_number}; skipping LLM extraction.")
+    else:
+        url = f"{base_url}?page={page_number}"
+        extracted_content = await _extract_with_retries(
+            llm_strategy, url, markdown, f"page {page_number}"
+        )
+        if extracted_content is None:
+            return [], False
+        llm_cache.set(
+            cache_key,
+            extracted_content,
+            llm_strategy.provider,
+            llm_strategy.instruction,
+        )
+
+    complete_products, extracted_count = _process_product_stream(
+        extracted_content, required_keys, dedup
+    )
+
+    if not extracted_count:
+        print(f"No products found on page {page_number}.")
+        return [], False
+
     if not complete_products:
         print(f"No complete products found on page {page_number}.")
         return [], False
 
     print(f"Extracted {len(complete_products)} products from page {page_number}.")
     return complete_products, False  # Continue crawling
+
+
+async def fetch_batch(
+    crawler: AsyncWebCrawler,
+    page_numbers: List[int],
+    base_url: str,
+    css_selector: str,
+    llm_strategy: LLMExtractionStrategy,
+    session_id: str,
+    required_keys: frozenset,
+    dedup: NameDedup,
+) -> Tuple[List[dict], bool, Optional[int]]:
+    """
+    Fetches several pages and extracts them with as few LLM calls as possible.
+
+    Pages are fetched concurrently, their markdown is merged under
+    "### PAGE <n>" markers, and the merged document goes to the LLM in one
+    call, so the fixed prompt overhead and completion round trip are paid
+    once per batch instead of once per page. Batches whose merged markdown
+    would exceed MAX_BATCH_CHARS are split into smaller LLM calls so a
+    fat page never blows the provider's token budget.
+
+    Processing stops at the first page that could not be fetched or whose
+    group's extraction failed; the pages after it stay unreported so the
+    caller's checkpoint never advances past work that was actually lost.
+
+    Args:
+        crawler (AsyncWebCrawler): The web crawler instance.
+        page_numbers (List[int]): The page numbers to fetch together.
+        base_url (str): The base URL of the website.
+        css_selector (str): The CSS selector to target the content.
+        llm_strategy (LLMExtractionStrategy): The LLM extraction strategy.
+        session_id (str): Prefix for the per-fetch session identifiers.
+        required_keys (frozenset): Keys that must be present and non-empty.
+        dedup (NameDedup): Duplicate detector for product names already seen.
+
+    Returns:
+        Tuple[List[dict], bool, Optional[int]]:
+            - List[dict]: The processed products from the completed pages.
+            - bool: A flag indicating if the "No Results Found" message was encountered.
+            - Optional[int]: The highest page number that fully completed,
+              or None if no page in the batch did.
+    """
+    # One session per batch slot so parallel fetches do not fight over
+    # the same browser page
+    fetches = await asyncio.gather(
+        *(
+            _fetch_page(
+                crawler, page_number, base_url, css_selector, f"{session_id}_{index}"
+            )
+            for index, page_number in enumerate(page_numbers)
+        )
+    )
+
+    no_results_found = False
+    sections = []
+    for page_number, markdown, page_html, no_results in fetches:
+        if no_results:
+            no_results_found = True
+            break  # Later pages are past the end of the listing
+        if markdown is None:
+            # A lost page must not be skipped over by the checkpoint, so
+            # drop it and everything after it; the next run retries them
+            break
+        sections.append(
+            (page_number, f"### PAGE {page_number}\n\n{markdown}", page_html)
+        )
+
+    # Greedily pack sections under the character budget; each group
+    # becomes one LLM call
+    groups = []
+    group = []
+    group_chars = 0
+    for page_number, section, page_html in sections:
+        if group and group_chars + len(section) > MAX_BATCH_CHARS:
+            groups.append(group)
+            group = []
+            group_chars = 0
+        group.append((page_number, section, page_html))
+        group_chars += len(section)
+    if group:
+        groups.append(group)
+
+    all_products = []
+    last_completed_page = None
+    for group in groups:
+        group_pages = [page_number for page_number, _, _ in group]
+        merged_markdown = "\n\n".join(section for _, section, _ in group)
+        merged_html = "\n".join(page_html for _, _, page_html in group)
+
+        # Look up a previous extraction of this exact group of pages
+        cache_key = llm_cache.compute_cache_key(
+            llm_strategy.provider, llm_strategy.instruction, merged_html
+        )
+        extracted_content = llm_cache.get(cache_key)
+        if extracted_content is not None and is_valid_cached_extraction(
+            extracted_content
+        ):
+            print("Cache hit for page batch; skipping LLM extraction.")
+        else:
+            extracted_content = await _extract_with_retries(
+                llm_strategy,
+                base_url,
+                merged_markdown,
+                f"pages {group_pages[0]}-{group_pages[-1]}",
+            )
+            if extracted_content is None:
+                # Stop here so the failed pages are retried next run
+                # instead of being checkpointed past and lost for good
+                break
+            llm_cache.set(
+                cache_key,
+                extracted_content,
+                llm_strategy.provider,
+                llm_strategy.instruction,
+            )
+
+        products, _ = _process_product_stream(
+            extracted_content, required_keys, dedup
+        )
+        all_products.extend(products)
+        last_completed_page = group_pages[-1]
+
+    if all_products:
+        print(
+            f"Extracted {len(all_products)} products from pages "
+            f"{page_numbers[0]}-{last_completed_page}."
+        )
+    return all_products, no_results_found, last_completed_page